@@ -1,196 +1,115 @@
-from flask import Flask, render_template, request, session, redirect, url_for, flash, jsonify
+from flask import Blueprint, Flask, current_app, render_template, request, session, redirect, url_for, flash
 import os, hashlib
-from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import func
-from werkzeug.security import check_password_hash, generate_password_hash
+from werkzeug.security import check_password_hash
 from functools import wraps
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-import resend
 
+from cache import make_cache, standings_cache_seconds
+from models import bind_db, db, Game, Team, PlayoffGame, PlayoffPick, User, Pick, MagicLinkToken
 
-load_dotenv()
+bp = Blueprint("main", __name__)
 
-app = Flask(__name__)
 
-BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(BASE_DIR, 'db.sqlite3')
-app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+def create_app(config=None):
+    load_dotenv()
 
-app.secret_key = os.environ.get("SECRET_KEY")
+    app = Flask(__name__)
 
-resend.api_key = os.environ.get("RESEND_API_KEY")
+    app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY")
+    app.config["RESEND_API_KEY"] = os.environ.get("RESEND_API_KEY")
+    app.config["CACHE_URL"] = os.environ.get("CACHE_URL")
+    if config:
+        app.config.update(config)
+    app.config.setdefault("STANDINGS_CACHE_SECONDS", standings_cache_seconds(app.config["CACHE_URL"]))
 
-db = SQLAlchemy(app)
+    bind_db(app)
+    app.extensions["cache"] = make_cache(app.config["CACHE_URL"])
+    app.register_blueprint(bp)
 
-class Game(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    home_team = db.Column(db.String(50))
-    away_team = db.Column(db.String(50))
-    home_id = db.Column(db.Integer)
-    away_id = db.Column(db.Integer)
-    home_score = db.Column(db.Integer)
-    away_score = db.Column(db.Integer)
-    title = db.Column(db.String(100))
-    line = db.Column(db.Float)
-    point_value = db.Column(db.Integer)
-    start_date = db.Column(db.DateTime(timezone=True))
-    completed = db.Column(db.Boolean, default=False)
-    is_playoff = db.Column(db.Boolean, default=False)
-
-class Team(db.Model):
-    __tablename__ = "teams"
-
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String, nullable=False)
-    seed = db.Column(db.Integer, nullable=True)
-    espn_id = db.Column(db.Integer)
-
-class PlayoffGame(db.Model):
-    __tablename__ = "playoff_games"
-
-    id = db.Column(db.Integer, primary_key=True)
-    round = db.Column(db.Integer, nullable=False)
-    name = db.Column(db.String, nullable=False)  # e.g. "Quarterfinal 1"
-    
-    # these reference earlier games; null if it's round 1
-    depends_on_game1 = db.Column(db.Integer, db.ForeignKey("playoff_games.id"), nullable=True)
-    depends_on_game2 = db.Column(db.Integer, db.ForeignKey("playoff_games.id"), nullable=True)
-
-    team1_id = db.Column(db.Integer, db.ForeignKey("teams.id"), nullable=True)
-    team2_id = db.Column(db.Integer, db.ForeignKey("teams.id"), nullable=True)
-
-    # if there's a bye, that team fills slot 1 automatically
-    bye_team_id = db.Column(db.Integer, db.ForeignKey("teams.id"), nullable=True)
-
-    # ESPN ID set manually once matchup exists IRL
-    espn_id = db.Column(db.String, nullable=True)
-
-    final_score_team1 = db.Column(db.Integer, nullable=True)
-    final_score_team2 = db.Column(db.Integer, nullable=True)
-    winner_team_id = db.Column(db.Integer, db.ForeignKey("teams.id"), nullable=True)
-
-    team1 = db.relationship("Team", foreign_keys=[team1_id])
-    team2 = db.relationship("Team", foreign_keys=[team2_id])
-    bye_team = db.relationship("Team", foreign_keys=[bye_team_id])
-    winner = db.relationship("Team", foreign_keys=[winner_team_id])
-
-class PlayoffPick(db.Model):
-    __tablename__ = "playoff_picks"
+    @app.cli.command("init-db")
+    def init_db():
+        db.create_all()
+        print("Database ready.")
 
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    playoff_game_id = db.Column(db.Integer, db.ForeignKey("playoff_games.id"), nullable=False)
-    team_id = db.Column(db.Integer, db.ForeignKey("teams.id"), nullable=False)
-    team = db.relationship("Team", foreign_keys=[team_id])
+    return app
 
-class User(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    email = db.Column(db.String(50), unique=True, nullable=False)
-    name = db.Column(db.String(50), nullable=False)
-    score = db.Column(db.Integer)
-    password_hash = db.Column(db.String(255), nullable=False)
-    is_admin = db.Column(db.Boolean, default=False)
 
-    def __init__(self, **kwargs):
-        raw_password = kwargs.pop("password", None)
-        if raw_password is not None:
-            kwargs["password_hash"] = generate_password_hash(raw_password)
+def send_email(params):
+    import resend  # deferred so workers that never send mail don't pay for it
 
-        super().__init__(**kwargs)
+    resend.api_key = current_app.config["RESEND_API_KEY"]
+    return resend.Emails.send(params)
 
-    # backref gives you "user.picks"
-    picks = db.relationship("Pick", backref="user", lazy=True)
+def update_scores():
+    # totals are built in memory and written in one commit, so a worker reading
+    # (or rebuilding) at the same time never sees zeroed or half-added scores
+    users = User.query.all()
+    scores = {user.id: 0 for user in users}
+
+    # ---------- REGULAR SEASON ----------
+    games = Game.query.filter_by(completed=True).all()
+    # nothing stops concurrent saves from leaving two rows for the same user and
+    # game; the oldest wins, same row save_pick's .first() keeps updating
+    picks = {}
+    for p in Pick.query.order_by(Pick.id).all():
+        picks.setdefault((p.game_id, p.user_id), p.chosen_team)
+    for game in games:
+        for user in users:
+            favorite = ""
+            if game.line < 0:
+                favorite = game.home_team
+            elif game.line > 0:
+                favorite = game.away_team
+            picked_team = picks.get((game.id, user.id), favorite)
+
+            home = game.home_score
+            away = game.away_score
+            diff = home - away + game.line
+
+            if diff > 0:
+                winner = game.home_team
+            elif diff < 0:
+                winner = game.away_team
+            else:
+                winner = "push"
 
-class Pick(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
+            if picked_team == winner:
+                scores[user.id] += game.point_value
 
-    # foreign key to User
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # ---------- PLAYOFFS ----------
+    playoff_picks = PlayoffPick.query.all()
 
-    # foreign key to the Game table
-    game_id = db.Column(db.Integer, db.ForeignKey('game.id'), nullable=False)
+    for pp in playoff_picks:
+        pg = db.session.get(PlayoffGame, pp.playoff_game_id)
 
-    # whatever else your pick needs
-    chosen_team = db.Column(db.String(50))
+        if not pg.espn_id:
+            continue
 
-    # game relationship (so "pick.game" works)
-    game = db.relationship("Game", backref="picks", lazy=True)
+        real_game = Game.query.filter_by(id=pg.espn_id).first()
+        if not real_game or not real_game.completed:
+            continue
 
-class MagicLinkToken(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_email = db.Column(db.String(255), nullable=False)
-    token_hash = db.Column(db.String(255), nullable=False)
-    expires_at = db.Column(db.DateTime, nullable=False)
+        # STRAIGHT WINNER (NO SPREAD)
+        home = real_game.home_score
+        away = real_game.away_score
 
-def update_scores():
-    with app.app_context():
-        # RESET
-        db.session.query(User).update({User.score: 0})
-        db.session.commit()
-
-        # ---------- REGULAR SEASON ----------
-        games = Game.query.filter_by(completed=True).all()
-        users = User.query.all();
-        for game in games:
-            for user in users:
-                pick = Pick.query.filter_by(game_id=game.id, user_id=user.id).first()
-                favorite = ""
-                if game.line < 0:
-                    favorite = game.home_team
-                elif game.line > 0:
-                    favorite = game.away_team
-                picked_team = pick.chosen_team if (pick is not None) else favorite
-
-                home = game.home_score
-                away = game.away_score
-                diff = home - away + game.line
-
-                if diff > 0:
-                    winner = game.home_team
-                elif diff < 0:
-                    winner = game.away_team
-                else:
-                    winner = "push"
-
-                if picked_team == winner:
-                    user.score += game.point_value
-                    db.session.add(user)
-
-        db.session.commit()
-
-        # ---------- PLAYOFFS ----------
-        playoff_picks = PlayoffPick.query.all()
-
-        for pp in playoff_picks:
-            pg = PlayoffGame.query.get(pp.playoff_game_id)
-            user = User.query.get(pp.user_id)
-
-            if not pg.espn_id:
-                continue
-
-            real_game = Game.query.filter_by(id=pg.espn_id).first()
-            if not real_game or not real_game.completed:
-                continue
-
-            # STRAIGHT WINNER (NO SPREAD)
-            home = real_game.home_score
-            away = real_game.away_score
-
-            if home > away:
-                real_winner = real_game.home_team
-            elif away > home:
-                real_winner = real_game.away_team
-            else:
-                real_winner = "push"
+        if home > away:
+            real_winner = real_game.home_team
+        elif away > home:
+            real_winner = real_game.away_team
+        else:
+            real_winner = "push"
 
-            # multiplier: 2 × round
-            round_points = 2 * pg.round
-            if pp.team.name == real_winner:
-                user.score += round_points
-                db.session.add(user)
+        # multiplier: 2 × round
+        round_points = 2 * pg.round
+        if pp.team.name == real_winner and pp.user_id in scores:
+            scores[pp.user_id] += round_points
 
-        db.session.commit()
+    for user in users:
+        user.score = scores[user.id]
+    db.session.commit()
 
 
 def create_magic_link(email):
@@ -227,14 +146,14 @@ def send_magic_link(email):
     """
 
 
-    params: resend.Emails.SendParams = {
+    params = {
         "from": "College Football <login@football.noahsiegel.dev>",
         "to": email,
         "subject": "Login Link",
         "html": magic_link_email_html.format(url=url)
     }
 
-    email = resend.Emails.send(params)
+    email = send_email(params)
 
 # returns bracket dict and visible picks dict in one deterministic pass
 def build_bracket_and_visible_playoff(playoff_games, user_playoff):
@@ -300,11 +219,11 @@ def login_required(f):
     @wraps(f)
     def wrapper(*args, **kwargs):
         if "user_id" not in session:
-            return redirect(url_for("login"))
+            return redirect(url_for("main.login"))
         return f(*args, **kwargs)
     return wrapper
 
-@app.route("/login", methods=["GET", "POST"])
+@bp.route("/login", methods=["GET", "POST"])
 def login():
     if request.method == "POST":
         email = request.form.get("email")
@@ -321,7 +240,7 @@ def login():
 
     return render_template("login.html")
 
-@app.route("/request", methods=["GET", "POST"])
+@bp.route("/request", methods=["GET", "POST"])
 def request_login():
     if request.method == "POST":
         email = request.form.get("email")
@@ -334,7 +253,7 @@ def request_login():
         return render_template("passwordless.html")
 
 
-@app.route("/verify")
+@bp.route("/verify")
 def verify_login():
     raw = request.args.get("token")
     token_hash = hashlib.sha256(raw.encode()).hexdigest()
@@ -354,14 +273,14 @@ def verify_login():
 
     return redirect("/")
 
-@app.route("/logout")
+@bp.route("/logout")
 def logout():
     session.pop("user_id", None)
     flash("Logged out.")
-    return redirect(url_for("index"))
+    return redirect(url_for("main.index"))
 
 
-@app.route("/register", methods=["GET", "POST"])
+@bp.route("/register", methods=["GET", "POST"])
 def register():
     if "user_id" not in session:
         if request.method == "POST":
@@ -394,7 +313,7 @@ def register():
         return redirect("/")
     return render_template("register.html")
 
-@app.route("/")
+@bp.route("/")
 def index():
     user = User.query.filter_by(id=session.get("user_id")).first()
     if user:
@@ -407,7 +326,7 @@ def index():
     else:
         return render_template("index.html", user=user)
 
-@app.route("/picks")
+@bp.route("/picks")
 @login_required
 def picks():
     user_id = session["user_id"]
@@ -455,7 +374,7 @@ def picks():
 
 
 
-@app.route("/api/save_pick", methods=["POST"])
+@bp.route("/api/save_pick", methods=["POST"])
 @login_required
 def save_pick():
     data = request.get_json()
@@ -468,7 +387,7 @@ def save_pick():
     game = Game.query.get_or_404(game_id)
 
     # see if user already has a pick for that game
-    existing = Pick.query.filter_by(user_id=user.id, game_id=game_id).first()
+    existing = Pick.query.filter_by(user_id=user.id, game_id=game_id).order_by(Pick.id).first()
 
     if existing:
         existing.chosen_team = pick_value
@@ -481,9 +400,11 @@ def save_pick():
         db.session.add(new_pick)
 
     db.session.commit()
+    # picks aren't locked at kickoff, so a save can change standings
+    current_app.extensions["cache"].delete("standings")
     return {"status": "ok"}
 
-@app.route("/api/save_playoff_pick", methods=["POST"])
+@bp.route("/api/save_playoff_pick", methods=["POST"])
 @login_required
 def save_playoff_pick():
     data = request.get_json()
@@ -499,13 +420,27 @@ def save_playoff_pick():
     pick.team_id = team_id
     db.session.add(pick)
     db.session.commit()
+    current_app.extensions["cache"].delete("standings")
 
     return {"success": True}
 
 
-@app.route("/standings")
+@bp.route("/standings")
 @login_required
 def standings():
+    # rescoring every user on every refresh is the expensive part; with a shared
+    # CACHE_URL the result is reused by all workers for a few seconds
+    cache = current_app.extensions["cache"]
+    ttl = current_app.config["STANDINGS_CACHE_SECONDS"]
+    leaderboard = cache.get("standings") if ttl else None
+    if leaderboard is None:
+        leaderboard = build_leaderboard()
+        if ttl:
+            cache.set("standings", leaderboard, ttl)
+
+    return render_template("standings.html", leaderboard=leaderboard)
+
+def build_leaderboard():
     update_scores()
     users = User.query.order_by(User.score.desc()).all()
     
@@ -530,9 +465,9 @@ def standings():
             "rank": current_rank
         })
 
-    return render_template("standings.html", leaderboard=leaderboard)
+    return leaderboard
 
-@app.route("/admin")
+@bp.route("/admin")
 @login_required
 def admin():
     user = User.query.filter_by(id=session["user_id"]).first()
@@ -572,25 +507,26 @@ def admin():
 
     return render_template("admin.html", results=results)
 
-@app.route("/help", methods=["GET", "POST"])
+@bp.route("/help", methods=["GET", "POST"])
 def help():
     if request.method == "POST":
         email = request.form.get("email")
         message = request.form.get("message")
-        params: resend.Emails.SendParams = {
+        params = {
             "from": "College Football Help Request <help@football.noahsiegel.dev>",
             "to": "njsiegel9@gmail.com",
             "subject": "Help Request",
             "html": f"Email: {email} Message: {message}"
         }
 
-        email = resend.Emails.send(params)
+        email = send_email(params)
         flash("Message sent!")
         return redirect("/")
     else:
         return render_template("help.html")
 
 if __name__ == "__main__":
+    app = create_app()
     with app.app_context():
         db.create_all()
     app.run(debug=True)
\ No newline at end of file
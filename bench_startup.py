@@ -0,0 +1,90 @@
+"""Measure how long a fresh worker takes to come up and how much memory it holds.
+
+    python bench_startup.py            # 10 cold starts
+    python bench_startup.py -n 25 --json
+
+Every run is a new interpreter, so nothing is warm from the previous one. The
+worker imports the app, builds it, serves one request against an in-memory db
+and reports its own timings and peak RSS.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+WORKER = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+import app as app_module
+t1 = time.perf_counter()
+app = app_module.create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:", "SECRET_KEY": "bench"})
+with app.app_context():
+    app_module.db.create_all()
+t2 = time.perf_counter()
+status = app.test_client().get("/").status_code
+t3 = time.perf_counter()
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    rss //= 1024  # bytes on macOS, KiB on linux
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "create_app_ms": (t2 - t1) * 1000,
+    "first_request_ms": (t3 - t2) * 1000,
+    "total_ms": (t3 - t0) * 1000,
+    "max_rss_kb": rss,
+    "status": status,
+    "heavy_modules": sorted(m for m in ("resend", "cfbd") if m in sys.modules),
+}))
+"""
+
+
+def run_once():
+    out = subprocess.run(
+        [sys.executable, "-c", WORKER],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def summarize(runs):
+    summary = {}
+    for key in ("import_ms", "create_app_ms", "first_request_ms", "total_ms", "max_rss_kb"):
+        values = [r[key] for r in runs]
+        summary[key] = {
+            "median": statistics.median(values),
+            "min": min(values),
+            "max": max(values),
+        }
+    summary["heavy_modules"] = runs[-1]["heavy_modules"]
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--runs", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print the summary as json")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    summary = summarize(runs)
+    summary["runs"] = args.runs
+    summary["python"] = sys.version.split()[0]
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"{args.runs} cold starts, python {summary['python']}")
+    print(f"{'':18}{'median':>10}{'min':>10}{'max':>10}")
+    for key in ("import_ms", "create_app_ms", "first_request_ms", "total_ms", "max_rss_kb"):
+        s = summary[key]
+        print(f"{key:18}{s['median']:>10.1f}{s['min']:>10.1f}{s['max']:>10.1f}")
+    print("resend/cfbd loaded at startup:", ", ".join(summary["heavy_modules"]) or "no")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import json
+import os
+import threading
+import time
+
+
+class LocalCache:
+    """In-process cache. Fine for `python app.py` or a single worker, but every
+    worker gets its own copy, so use RedisCache when running several."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, timeout=None):
+        expires = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            self._data[key] = (value, expires)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class RedisCache:
+    """Shared cache so every worker sees the same values. Values must be JSON-able."""
+
+    def __init__(self, url, prefix="cfb:"):
+        import redis  # only needed when CACHE_URL is set
+
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key):
+        raw = self._client.get(self._prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, timeout=None):
+        self._client.set(self._prefix + key, json.dumps(value), ex=timeout or None)
+
+    def delete(self, key):
+        self._client.delete(self._prefix + key)
+
+
+def standings_cache_seconds(cache_url=None):
+    # off unless the workers share a cache, so refreshes show live standings
+    # and never disagree between workers
+    return int(os.environ.get("STANDINGS_CACHE_SECONDS", 30 if cache_url else 0))
+
+
+def make_cache(url=None):
+    # CACHE_URL like redis://localhost:6379/0 -> shared, otherwise per-process
+    if url:
+        return RedisCache(url)
+    return LocalCache()
@@ -0,0 +1,19 @@
+import multiprocessing
+import os
+
+from cache import standings_cache_seconds
+
+bind = os.environ.get("BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+# a per-worker standings cache would show each worker a different leaderboard
+if workers > 1 and not os.environ.get("CACHE_URL") and standings_cache_seconds():
+    raise SystemExit(
+        "STANDINGS_CACHE_SECONDS needs a shared CACHE_URL (redis) with more than one worker"
+    )
+
+# sqlite serializes writes; threads just queue on the same lock
+threads = 1
+timeout = 30
+# the app is built after fork, so each worker opens its own db connections
+preload_app = False
+accesslog = "-"
@@ -0,0 +1,583 @@
+"""Replay game-day traffic against a local instance and report per-route latency.
+
+    python loadtest.py                          # seed a db, start gunicorn, run
+    python loadtest.py --users 100 --workers 8 --out run.json
+    python loadtest.py --compare run.json       # same run, diffed against run.json
+
+By default a synthetic db is seeded in a temp dir and `gunicorn -c
+gunicorn.conf.py wsgi:app` is started on it, so server errors (including
+"database is locked") can be read back from its log. To hit a server you
+started yourself, point its DATABASE_URL at a file, then pass the same file
+with --db and the server with --url; the db is wiped and reseeded first, and
+lock counts are not available. A --db file that loadtest.py did not create
+itself is never wiped unless --force is given.
+
+Traffic runs in phases (see SCENARIO): logins and magic-link verifies, people
+browsing /picks and the reloadPicks AJAX fetch, a save_pick burst before
+kickoff, then a /standings storm once games go final. The seed, data set and
+scenario are fixed so runs against different commits are comparable. /request
+is left out on purpose since it would send real email through resend.
+"""
+import argparse
+import http.cookiejar
+import json
+import math
+import os
+import random
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+PASSWORD = "password"
+
+# think = seconds a virtual user waits between requests
+SCENARIO = [
+    {"name": "login", "seconds": 10, "think": 0.5,
+     "weights": {"login": 3, "verify": 1, "picks": 2}},
+    {"name": "browse", "seconds": 20, "think": 1.0,
+     "weights": {"picks": 2, "picks_ajax": 3, "save_pick": 2, "save_playoff_pick": 1, "standings": 1}},
+    {"name": "kickoff", "seconds": 15, "think": 0.05,
+     "weights": {"save_pick": 6, "save_playoff_pick": 2, "picks_ajax": 2}},
+    # complete_games: mark this many more games final before the phase starts
+    {"name": "final", "seconds": 15, "think": 0.1, "complete_games": 10,
+     "weights": {"standings": 8, "picks": 1}},
+]
+
+# anything else counts as an error
+EXPECTED_STATUS = {
+    "login": 302,
+    "verify": 302,
+    "picks": 200,
+    "picks_ajax": 200,
+    "save_pick": 200,
+    "save_playoff_pick": 200,
+    "standings": 200,
+}
+
+ROUTE_PATHS = {
+    "/login": "login",
+    "/verify": "verify",
+    "/api/save_pick": "save_pick",
+    "/api/save_playoff_pick": "save_playoff_pick",
+    "/standings": "standings",
+}
+
+
+# ---------- SYNTHETIC DB ----------
+
+def build_dataset(seed, users, games):
+    rng = random.Random(seed)
+    kickoff = datetime(2025, 12, 20, 17, 0)
+
+    game_rows = []
+    for i in range(games):
+        game_rows.append({
+            "id": 1000 + i,
+            "home_team": f"Home {i}",
+            "away_team": f"Away {i}",
+            "line": rng.choice([-14.5, -7, -3.5, -1, 1, 3.5, 7, 10.5]),
+            "start_date": kickoff + timedelta(hours=3 * (i // 4)),
+            # first quarter of the slate is already final
+            "completed": i < games // 4,
+            "home_score": rng.randint(0, 45),
+            "away_score": rng.randint(0, 45),
+        })
+
+    teams = [{"id": i + 1, "name": f"Seed {i + 1}", "seed": i + 1} for i in range(12)]
+
+    # 12-team bracket: seeds 5-12 play round 1, seeds 1-4 get byes
+    playoff = []
+    for i in range(4):
+        playoff.append({"id": i + 1, "round": 1, "name": f"First Round {i + 1}",
+                        "team1_id": 5 + i, "team2_id": 12 - i})
+    for i in range(4):
+        playoff.append({"id": 5 + i, "round": 2, "name": f"Quarterfinal {i + 1}",
+                        "bye_team_id": 1 + i, "depends_on_game2": 1 + i})
+    playoff.append({"id": 9, "round": 3, "name": "Semifinal 1", "depends_on_game1": 5, "depends_on_game2": 8})
+    playoff.append({"id": 10, "round": 3, "name": "Semifinal 2", "depends_on_game1": 6, "depends_on_game2": 7})
+    playoff.append({"id": 11, "round": 4, "name": "Championship", "depends_on_game1": 9, "depends_on_game2": 10})
+
+    user_rows = [{"email": f"user{i}@example.com", "name": f"User {i}"} for i in range(users)]
+
+    picks = []
+    for u in range(users):
+        for g in game_rows:
+            if rng.random() < 0.7:
+                picks.append((u + 1, g["id"], rng.choice([g["home_team"], g["away_team"]])))
+
+    # raw tokens are kept here, two per user; only their hashes go in the db
+    tokens = [[rng.randbytes(32).hex() for _ in range(2)] for _ in range(users)]
+
+    return {"games": game_rows, "teams": teams, "playoff": playoff,
+            "users": user_rows, "picks": picks, "tokens": tokens}
+
+
+def is_seeded_here(path):
+    # seed_db leaves this table behind so a later run knows the file is ours to wipe
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'loadtest_seed'"
+        ).fetchone() is not None
+    except sqlite3.DatabaseError:
+        return False
+    finally:
+        conn.close()
+
+
+def seed_db(path, data):
+    import hashlib
+    from werkzeug.security import generate_password_hash
+    from app import create_app
+    from models import db, Game, Team, PlayoffGame, User, Pick, MagicLinkToken
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite:///" + path})
+    # one hash for everyone; hashing per user would dominate seeding time
+    password_hash = generate_password_hash(PASSWORD)
+
+    with app.app_context():
+        db.drop_all()
+        db.session.execute(db.text("DROP TABLE IF EXISTS loadtest_seed"))
+        db.create_all()
+
+        for g in data["games"]:
+            db.session.add(Game(
+                id=g["id"],
+                home_team=g["home_team"],
+                away_team=g["away_team"],
+                home_score=g["home_score"] if g["completed"] else None,
+                away_score=g["away_score"] if g["completed"] else None,
+                line=g["line"],
+                point_value=2,
+                start_date=g["start_date"],
+                completed=g["completed"],
+                is_playoff=False,
+            ))
+        for t in data["teams"]:
+            db.session.add(Team(**t))
+        for pg in data["playoff"]:
+            db.session.add(PlayoffGame(**pg))
+        for u in data["users"]:
+            db.session.add(User(password_hash=password_hash, score=0, **u))
+        db.session.flush()
+
+        db.session.bulk_save_objects([
+            Pick(user_id=u, game_id=g, chosen_team=team) for u, g, team in data["picks"]
+        ])
+
+        expires = datetime.utcnow() + timedelta(days=1)
+        for user, tokens in zip(data["users"], data["tokens"]):
+            for token in tokens:
+                db.session.add(MagicLinkToken(
+                    user_email=user["email"],
+                    token_hash=hashlib.sha256(token.encode()).hexdigest(),
+                    expires_at=expires,
+                ))
+        db.session.execute(db.text("CREATE TABLE loadtest_seed (seeded_at TEXT)"))
+        db.session.execute(db.text("INSERT INTO loadtest_seed VALUES (:t)"), {"t": datetime.utcnow().isoformat()})
+        db.session.commit()
+
+
+def complete_games(path, data, count):
+    # what fetch_data does when scores come in
+    pending = [g for g in data["games"] if not g["completed"]][:count]
+    conn = sqlite3.connect(path, timeout=15)
+    with conn:
+        for g in pending:
+            g["completed"] = True
+            conn.execute(
+                "UPDATE game SET completed = 1, home_score = ?, away_score = ? WHERE id = ?",
+                (g["home_score"], g["away_score"], g["id"]),
+            )
+    conn.close()
+    # same as fetch_data: only a shared cache can be cleared from out here
+    cache_url = os.environ.get("CACHE_URL")
+    if cache_url:
+        from cache import make_cache
+        make_cache(cache_url).delete("standings")
+    return len(pending)
+
+
+# ---------- SERVER ----------
+
+def free_port():
+    import socket
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(db_path, workers, standings_cache, log_path):
+    port = free_port()
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": "sqlite:///" + db_path,
+        "SECRET_KEY": "loadtest",
+        "BIND": f"127.0.0.1:{port}",
+        "WEB_CONCURRENCY": str(workers),
+        "STANDINGS_CACHE_SECONDS": str(standings_cache),
+    })
+    log = open(log_path, "w")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=log,
+    )
+    url = f"http://127.0.0.1:{port}"
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"gunicorn exited early, see {log_path}")
+        try:
+            urllib.request.urlopen(url + "/", timeout=1).read()
+            return proc, url
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit(f"gunicorn did not come up, see {log_path}")
+
+
+def check_server_db(url, data):
+    # a seeded user can only log in if the server reads the db we just seeded
+    opener = urllib.request.build_opener(NoRedirect)
+    body = urllib.parse.urlencode({"email": data["users"][0]["email"], "password": PASSWORD}).encode()
+    try:
+        with opener.open(url + "/login", data=body, timeout=30) as resp:
+            return resp.status == 302
+    except urllib.error.HTTPError as e:
+        return e.code == 302
+    except OSError:
+        return False
+
+
+def server_lock_errors(log_path):
+    """(time, routes) for each "database is locked" traceback in the server log.
+
+    /picks and its AJAX fetch share a URL, so those entries could be either.
+    """
+    with open(log_path) as f:
+        text = f.read()
+    found = []
+    parts = re.split(r"^\[([\d\- :,]+)\] ERROR in app: Exception on (\S+) ", text, flags=re.M)
+    # split keeps the captured groups: [before, when, path, block, when, path, block, ...]
+    for when, path, block in zip(parts[1::3], parts[2::3], parts[3::3]):
+        if "database is locked" not in block:
+            continue
+        path = path.split("?", 1)[0]
+        routes = ("picks", "picks_ajax") if path == "/picks" else (ROUTE_PATHS.get(path, path),)
+        found.append((datetime.strptime(when, "%Y-%m-%d %H:%M:%S,%f").timestamp(), routes))
+    return found
+
+
+def mark_locked(samples, log_path):
+    # pair each locked traceback with the failed request of that route that
+    # finished closest to it, so the lock lands in that request's phase
+    for when, routes in server_lock_errors(log_path):
+        candidates = [s for s in samples
+                      if s["route"] in routes and s["status"] == 500 and not s["locked"]]
+        if candidates:
+            min(candidates, key=lambda s: abs(s["end"] - when))["locked"] = True
+
+
+# ---------- TRAFFIC ----------
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    # keep 302s as responses so login/verify are timed on their own
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class VirtualUser(threading.Thread):
+
+    def __init__(self, index, run):
+        super().__init__(daemon=True)
+        self.index = index
+        self.run_state = run
+        self.rng = random.Random(run.seed * 100003 + index)
+        self.user = run.data["users"][index]
+        # only this user's links, so a verify never logs us in as someone else
+        self.tokens = list(run.data["tokens"][index])
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), NoRedirect,
+        )
+
+    def request(self, route, path, data=None, json_body=None, headers=None):
+        headers = dict(headers or {})
+        if json_body is not None:
+            data = json.dumps(json_body).encode()
+            headers["Content-Type"] = "application/json"
+        elif data is not None:
+            data = urllib.parse.urlencode(data).encode()
+        req = urllib.request.Request(self.run_state.url + path, data=data, headers=headers)
+
+        # bucket by the phase the request was sent in, not the one it finished in
+        phase = self.run_state.phase["name"]
+        start = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=30) as resp:
+                resp.read()
+                status = resp.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except OSError:
+            status = None
+        elapsed = (time.perf_counter() - start) * 1000
+        self.run_state.record(phase, route, elapsed, status)
+
+    def do(self, action):
+        run = self.run_state
+        if action == "verify":
+            if not self.tokens:
+                action = "login"
+            else:
+                return self.request("verify", "/verify?token=" + self.tokens.pop(0))
+        if action == "login":
+            return self.request("login", "/login", data={"email": self.user["email"], "password": PASSWORD})
+        if action == "picks":
+            return self.request("picks", "/picks")
+        if action == "picks_ajax":
+            return self.request("picks_ajax", "/picks", headers={"X-Requested-With": "XMLHttpRequest"})
+        if action == "save_pick":
+            game = self.rng.choice(run.data["games"])
+            return self.request("save_pick", "/api/save_pick", json_body={
+                "game_id": game["id"], "pick": self.rng.choice([game["home_team"], game["away_team"]]),
+            })
+        if action == "save_playoff_pick":
+            pg = self.rng.choice(run.data["playoff"])
+            return self.request("save_playoff_pick", "/api/save_playoff_pick", json_body={
+                "playoff_game_id": pg["id"], "team_id": self.rng.randint(1, len(run.data["teams"])),
+            })
+        if action == "standings":
+            return self.request("standings", "/standings")
+        raise ValueError(f"unknown action {action!r}")
+
+    def run(self):
+        run = self.run_state
+        # stagger arrivals over the first second
+        time.sleep(self.rng.random())
+        self.do("login")
+        while not run.stop.is_set():
+            phase = run.phase
+            actions = list(phase["weights"])
+            action = self.rng.choices(actions, weights=[phase["weights"][a] for a in actions])[0]
+            self.do(action)
+            run.stop.wait(self.rng.expovariate(1 / phase["think"]) if phase["think"] else 0)
+
+
+class Run:
+
+    def __init__(self, url, data, seed):
+        self.url = url
+        self.data = data
+        self.seed = seed
+        self.phase = None
+        self.stop = threading.Event()
+        self.samples = []
+
+    def record(self, phase, route, ms, status):
+        # end is wall-clock so it can be lined up with the server log
+        self.samples.append({"phase": phase, "route": route, "ms": ms, "status": status,
+                             "end": time.time(), "locked": False})
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples, seconds, locks_known):
+    by_route = {}
+    for s in samples:
+        by_route.setdefault(s["route"], []).append(s)
+
+    routes = {}
+    for route, rows in sorted(by_route.items()):
+        latencies = sorted(s["ms"] for s in rows)
+        errors = sum(1 for s in rows if s["status"] != EXPECTED_STATUS[route])
+        locks = sum(1 for s in rows if s["locked"]) if locks_known else None
+        routes[route] = {
+            "count": len(rows),
+            "rps": len(rows) / seconds,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": latencies[-1],
+            "errors": errors,
+            "error_rate": errors / len(rows),
+            "locks": locks,
+            "lock_rate": locks / len(rows) if locks_known else None,
+        }
+    return routes
+
+
+def run_scenario(url, db_path, data, users, seed):
+    run = Run(url, data, seed)
+    run.phase = SCENARIO[0]
+    vusers = [VirtualUser(i, run) for i in range(users)]
+
+    started = time.monotonic()
+    phase_times = {}
+    for i, phase in enumerate(SCENARIO):
+        if phase.get("complete_games"):
+            complete_games(db_path, data, phase["complete_games"])
+        run.phase = phase
+        phase_start = time.monotonic()
+        if i == 0:
+            for v in vusers:
+                v.start()
+        time.sleep(phase["seconds"])
+        phase_times[phase["name"]] = time.monotonic() - phase_start
+    run.stop.set()
+    for v in vusers:
+        v.join(timeout=35)
+    total = time.monotonic() - started
+    return run.samples, phase_times, total
+
+
+def summarize_run(samples, phase_times, total, locks_known):
+    phases = {}
+    for phase in SCENARIO:
+        name = phase["name"]
+        rows = [s for s in samples if s["phase"] == name]
+        phases[name] = summarize(rows, phase_times[name], locks_known)
+    return summarize(samples, total, locks_known), phases
+
+
+# ---------- REPORT ----------
+
+def print_table(title, routes):
+    print(title)
+    print(f"  {'route':20}{'count':>8}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'err%':>7}{'lock%':>7}")
+    for route, r in routes.items():
+        locks = r.get("lock_rate")
+        lock = f"{locks * 100:>7.1f}" if locks is not None else f"{'-':>7}"
+        print(f"  {route:20}{r['count']:>8}{r['rps']:>8.1f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}"
+              f"{r['p99_ms']:>9.1f}{r['error_rate'] * 100:>7.1f}{lock}")
+
+
+def print_compare(current, baseline):
+    if baseline["config"] != current["config"]:
+        print("warning: baseline was run with a different config, numbers may not be comparable")
+        for key in sorted(set(baseline["config"]) | set(current["config"])):
+            if baseline["config"].get(key) != current["config"].get(key):
+                print(f"  {key}: {baseline['config'].get(key)!r} -> {current['config'].get(key)!r}")
+    print("vs baseline (p95 ms, rps, err%)")
+    for route, r in current["routes"].items():
+        old = baseline["routes"].get(route)
+        if not old:
+            print(f"  {route:20} new")
+            continue
+        print(f"  {route:20}{old['p95_ms']:>9.1f} -> {r['p95_ms']:<9.1f}"
+              f"{old['rps']:>7.1f} -> {r['rps']:<7.1f}"
+              f"{old['error_rate'] * 100:>6.1f} -> {r['error_rate'] * 100:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50, help="concurrent virtual users")
+    parser.add_argument("--games", type=int, default=40, help="regular-season games to seed")
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn workers to start")
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every phase length")
+    parser.add_argument("--db", help="sqlite file to seed (default: temp dir); required with --url")
+    parser.add_argument("--url", help="existing server to drive instead of starting gunicorn")
+    parser.add_argument("--force", action="store_true",
+                        help="let --db wipe an existing file this script did not create")
+    parser.add_argument("--standings-cache", type=int, metavar="SECONDS",
+                        help="STANDINGS_CACHE_SECONDS for the server (default: the app's own default, "
+                             "0 without CACHE_URL); with --url, what that server was started with")
+    parser.add_argument("--out", help="write results as json")
+    parser.add_argument("--compare", help="earlier --out file to diff against")
+    args = parser.parse_args()
+
+    if args.url and not args.db:
+        parser.error("--url needs --db pointing at the file the server's DATABASE_URL uses")
+    if args.db and os.path.exists(args.db) and os.path.getsize(args.db) \
+            and not is_seeded_here(args.db) and not args.force:
+        parser.error(f"{args.db} was not created by loadtest.py and would be wiped; pass --force to do it anyway")
+
+    from cache import standings_cache_seconds
+    cache_url = os.environ.get("CACHE_URL")
+    standings_cache = args.standings_cache
+    if standings_cache is None:
+        standings_cache = standings_cache_seconds(cache_url)
+    if standings_cache and not cache_url:
+        if not args.url and args.workers > 1:
+            parser.error("--standings-cache needs a shared CACHE_URL with more than one worker")
+        # the harness can't clear a cache inside the server when games go final
+        print("warning: local standings cache; the final phase will mostly serve "
+              "standings from before the games finished", file=sys.stderr)
+
+    for phase in SCENARIO:
+        phase["seconds"] *= args.scale
+
+    workdir = tempfile.mkdtemp(prefix="cfb-loadtest-")
+    db_path = os.path.abspath(args.db or os.path.join(workdir, "loadtest.sqlite3"))
+    log_path = os.path.join(workdir, "server.log")
+
+    data = build_dataset(args.seed, args.users, args.games)
+    seed_db(db_path, data)
+
+    proc = None
+    url = args.url
+    if not url:
+        proc, url = start_server(db_path, args.workers, standings_cache, log_path)
+    elif not check_server_db(url, data):
+        raise SystemExit(f"seeded users can't log in at {url}; is its DATABASE_URL sqlite:///{db_path}?")
+    try:
+        samples, phase_times, total = run_scenario(url, db_path, data, args.users, args.seed)
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    if proc:
+        mark_locked(samples, log_path)
+    routes, phases = summarize_run(samples, phase_times, total, locks_known=bool(proc))
+
+    results = {
+        "config": {
+            "users": args.users, "games": args.games, "seed": args.seed, "scale": args.scale,
+            "workers": args.workers if proc else None, "external_url": bool(args.url),
+            "scenario": SCENARIO,
+            "cache_url": bool(cache_url),
+            "standings_cache_seconds": standings_cache,
+        },
+        "python": sys.version.split()[0],
+        "seconds": total,
+        "routes": routes,
+        "phases": phases,
+    }
+
+    for name, summary in phases.items():
+        print_table(f"phase {name}", summary)
+    print_table(f"all phases ({total:.0f}s, {args.users} users)", routes)
+    if proc:
+        print("lock%: requests that failed with \"database is locked\" in the server log. /picks and")
+        print("its AJAX fetch share a URL, so those two are told apart by the nearest failure time.")
+        print(f"server log: {log_path}")
+    else:
+        print("lock%: not available against --url, the harness can't read that server's log")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            print_compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
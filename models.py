@@ -0,0 +1,124 @@
+import os
+from flask_sqlalchemy import SQLAlchemy
+from werkzeug.security import generate_password_hash
+
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+# bound to an app by bind_db(); scripts can import models without the web app
+db = SQLAlchemy()
+
+
+def bind_db(app):
+    # shared by create_app() and fetch_data so both talk to the db the same way
+    uri = app.config.setdefault(
+        "SQLALCHEMY_DATABASE_URI",
+        os.environ.get("DATABASE_URL", "sqlite:///" + os.path.join(BASE_DIR, "db.sqlite3")),
+    )
+    app.config.setdefault("SQLALCHEMY_TRACK_MODIFICATIONS", False)
+    if uri.startswith("sqlite"):
+        # workers and fetch_data share one sqlite file; wait on its write lock
+        # instead of failing (timeout is a sqlite3-only connect argument)
+        options = app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {})
+        options.setdefault("connect_args", {}).setdefault("timeout", 15)
+    db.init_app(app)
+
+class Game(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    home_team = db.Column(db.String(50))
+    away_team = db.Column(db.String(50))
+    home_id = db.Column(db.Integer)
+    away_id = db.Column(db.Integer)
+    home_score = db.Column(db.Integer)
+    away_score = db.Column(db.Integer)
+    title = db.Column(db.String(100))
+    line = db.Column(db.Float)
+    point_value = db.Column(db.Integer)
+    start_date = db.Column(db.DateTime(timezone=True))
+    completed = db.Column(db.Boolean, default=False)
+    is_playoff = db.Column(db.Boolean, default=False)
+
+class Team(db.Model):
+    __tablename__ = "teams"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String, nullable=False)
+    seed = db.Column(db.Integer, nullable=True)
+    espn_id = db.Column(db.Integer)
+
+class PlayoffGame(db.Model):
+    __tablename__ = "playoff_games"
+
+    id = db.Column(db.Integer, primary_key=True)
+    round = db.Column(db.Integer, nullable=False)
+    name = db.Column(db.String, nullable=False)  # e.g. "Quarterfinal 1"
+    
+    # these reference earlier games; null if it's round 1
+    depends_on_game1 = db.Column(db.Integer, db.ForeignKey("playoff_games.id"), nullable=True)
+    depends_on_game2 = db.Column(db.Integer, db.ForeignKey("playoff_games.id"), nullable=True)
+
+    team1_id = db.Column(db.Integer, db.ForeignKey("teams.id"), nullable=True)
+    team2_id = db.Column(db.Integer, db.ForeignKey("teams.id"), nullable=True)
+
+    # if there's a bye, that team fills slot 1 automatically
+    bye_team_id = db.Column(db.Integer, db.ForeignKey("teams.id"), nullable=True)
+
+    # ESPN ID set manually once matchup exists IRL
+    espn_id = db.Column(db.String, nullable=True)
+
+    final_score_team1 = db.Column(db.Integer, nullable=True)
+    final_score_team2 = db.Column(db.Integer, nullable=True)
+    winner_team_id = db.Column(db.Integer, db.ForeignKey("teams.id"), nullable=True)
+
+    team1 = db.relationship("Team", foreign_keys=[team1_id])
+    team2 = db.relationship("Team", foreign_keys=[team2_id])
+    bye_team = db.relationship("Team", foreign_keys=[bye_team_id])
+    winner = db.relationship("Team", foreign_keys=[winner_team_id])
+
+class PlayoffPick(db.Model):
+    __tablename__ = "playoff_picks"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    playoff_game_id = db.Column(db.Integer, db.ForeignKey("playoff_games.id"), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey("teams.id"), nullable=False)
+    team = db.relationship("Team", foreign_keys=[team_id])
+
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    email = db.Column(db.String(50), unique=True, nullable=False)
+    name = db.Column(db.String(50), nullable=False)
+    score = db.Column(db.Integer)
+    password_hash = db.Column(db.String(255), nullable=False)
+    is_admin = db.Column(db.Boolean, default=False)
+
+    def __init__(self, **kwargs):
+        raw_password = kwargs.pop("password", None)
+        if raw_password is not None:
+            kwargs["password_hash"] = generate_password_hash(raw_password)
+
+        super().__init__(**kwargs)
+
+    # backref gives you "user.picks"
+    picks = db.relationship("Pick", backref="user", lazy=True)
+
+class Pick(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+
+    # foreign key to User
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+
+    # foreign key to the Game table
+    game_id = db.Column(db.Integer, db.ForeignKey('game.id'), nullable=False)
+
+    # whatever else your pick needs
+    chosen_team = db.Column(db.String(50))
+
+    # game relationship (so "pick.game" works)
+    game = db.relationship("Game", backref="picks", lazy=True)
+
+class MagicLinkToken(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_email = db.Column(db.String(255), nullable=False)
+    token_hash = db.Column(db.String(255), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
@@ -0,0 +1,15 @@
+"""Production entry point.
+
+    flask --app app init-db                # once, before starting workers
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Each worker is its own process with its own memory, so standings are only
+cached when CACHE_URL points at a shared redis, e.g.
+CACHE_URL=redis://localhost:6379/0 (needs `pip install redis`). Without it
+every request rescores live; setting STANDINGS_CACHE_SECONDS without
+CACHE_URL is refused by gunicorn.conf.py unless there is a single worker.
+SECRET_KEY must be set so all workers sign sessions the same way.
+"""
+from app import create_app
+
+app = create_app()